@@ -15,14 +15,37 @@ References:
 import pylink
 import pty
 import os
-import select
+import selectors
 import signal
+import stat
 import sys
+import threading
 import time
+import traceback
 import argparse
 import errno
 
 
+# Bounds of the idle poll interval (seconds) used by the main loop
+IDLE_POLL_MIN = 0.002
+IDLE_POLL_MAX = 0.05
+
+# Maximum number of bytes requested from the RTT up-buffer per read
+RTT_READ_SIZE = 4096
+
+# Maximum number of bytes read from the PTY per wakeup (bidirectional mode)
+PTY_READ_SIZE = 4096
+
+# Limits on one drain of the RTT up-buffer: bytes collected before writing
+# them to the PTY, and time (seconds) spent reading, so that a busy target
+# cannot starve the PTY-to-RTT direction
+RTT_DRAIN_MAX_BYTES = 65536
+RTT_DRAIN_MAX_TIME = 0.005
+
+# Interval (seconds) between J-Link connection checks in the main loop
+HEALTH_CHECK_INTERVAL = 1.0
+
+
 class RTTBridgeError(Exception):
     """Custom exception for RTT bridge errors."""
     pass
@@ -47,9 +70,28 @@ def validate_speed(speed):
     return speed
 
 
+def _parse_number(text):
+    """Parse an integer, honouring a 0x/0o/0b prefix and defaulting to decimal.
+    
+    Args:
+        text: Number string
+        
+    Returns:
+        int: Parsed value
+        
+    Raises:
+        ValueError: If text is not a valid number
+    """
+    base = 0 if text[:2].lower() in ('0x', '0o', '0b') else 10
+    return int(text, base)
+
+
 def parse_address(address_str):
     """Parse RTT address or search range string.
     
+    Numbers with a 0x, 0o or 0b prefix are parsed as hex, octal or binary;
+    anything else is decimal, so zero-padded values such as 0100 stay 100.
+    
     Args:
         address_str: Address string (hex) or search range (start,size)
         
@@ -64,21 +106,21 @@ def parse_address(address_str):
     
     address_str = address_str.strip()
     
-    if ',' in address_str:
+    start_str, sep, size_str = address_str.partition(',')
+    if sep:
         # Search range: "start,size"
-        parts = address_str.split(',')
-        if len(parts) != 2:
+        if ',' in size_str:
             raise ValueError(f"Invalid search range format: '{address_str}' (expected 'start,size')")
         
-        start_str = parts[0].strip()
-        size_str = parts[1].strip()
+        start_str = start_str.strip()
+        size_str = size_str.strip()
         
         if not start_str or not size_str:
             raise ValueError(f"Invalid search range format: '{address_str}' (both start and size required)")
         
         try:
-            start = int(start_str, 16) if start_str.startswith('0x') else int(start_str, 16) if start_str.startswith('0X') else int(start_str)
-            size = int(size_str, 16) if size_str.startswith('0x') else int(size_str, 16) if size_str.startswith('0X') else int(size_str)
+            start = _parse_number(start_str)
+            size = _parse_number(size_str)
         except ValueError as e:
             raise ValueError(f"Invalid number format in search range '{address_str}': {e}")
         
@@ -93,7 +135,7 @@ def parse_address(address_str):
     else:
         # Specific address
         try:
-            addr = int(address_str, 16) if address_str.startswith(('0x', '0X')) else int(address_str)
+            addr = _parse_number(address_str)
         except ValueError as e:
             raise ValueError(f"Invalid address format '{address_str}': {e}")
         
@@ -105,14 +147,16 @@ def parse_address(address_str):
         return (addr, None)
 
 
-def find_buffer_by_name(jlink, name, up=True, max_retries=3):
+def find_buffer_by_name(jlink, name, up=True, max_retries=3, rtt_active=None):
     """Find an RTT buffer by name with retry logic.
     
     Args:
         jlink: pylink.JLink instance
         name: Buffer name to search for
         up: True for UP buffers, False for DOWN buffers
-        max_retries: Maximum number of retries if RTT not ready
+        max_retries: Maximum number of attempts while RTT reports no buffers
+            or fails to answer; a buffer that is simply absent is not retried
+        rtt_active: Callable from make_rtt_active_check() (built from jlink if None)
         
     Returns:
         tuple: (buffer index, descriptor) or (-1, None) if not found
@@ -124,18 +168,23 @@ def find_buffer_by_name(jlink, name, up=True, max_retries=3):
         return -1, None
     
     name = name.strip()
+    # Descriptor names may be str or bytes depending on the pylink version;
+    # compare against a matching target so no name needs decoding.
+    name_bytes = name.encode('utf-8')
+    
+    if rtt_active is None:
+        rtt_active = make_rtt_active_check(jlink)
+    get_num_buffers = (jlink.rtt_get_num_up_buffers if up
+                       else jlink.rtt_get_num_down_buffers)
+    get_buf_descriptor = jlink.rtt_get_buf_descriptor
+    
+    # Verify RTT is active
+    if not rtt_active():
+        raise RTTBridgeError("RTT is not active. Ensure RTT has been started successfully.")
     
     for attempt in range(max_retries):
         try:
-            # Verify RTT is active
-            if not is_rtt_active(jlink):
-                if attempt < max_retries - 1:
-                    time.sleep(0.2)
-                    continue
-                raise RTTBridgeError("RTT is not active. Ensure RTT has been started successfully.")
-            
-            num_buffers = (jlink.rtt_get_num_up_buffers() if up 
-                          else jlink.rtt_get_num_down_buffers())
+            num_buffers = get_num_buffers()
             
             if num_buffers == 0:
                 if attempt < max_retries - 1:
@@ -146,21 +195,25 @@ def find_buffer_by_name(jlink, name, up=True, max_retries=3):
             
             for index in range(num_buffers):
                 try:
-                    desc = jlink.rtt_get_buf_descriptor(index, up)
+                    desc = get_buf_descriptor(index, up)
                     if desc is None:
                         continue
                     
-                    buffer_name = desc.name.rstrip('\x00') if isinstance(desc.name, str) else desc.name.decode('utf-8', errors='replace').rstrip('\x00')
-                    if buffer_name == name:
+                    buffer_name = desc.name
+                    if isinstance(buffer_name, str):
+                        matched = buffer_name.rstrip('\x00') == name
+                    else:
+                        matched = buffer_name.rstrip(b'\x00') == name_bytes
+                    if matched:
                         # Validate descriptor
                         if desc.SizeOfBuffer == 0:
                             raise RTTBridgeError(f"Buffer '{name}' has invalid size (0)")
                         return index, desc
-                except (pylink.errors.JLinkRTTException, UnicodeDecodeError) as e:
+                except pylink.errors.JLinkRTTException:
                     # Skip this buffer and continue searching
                     continue
             
-            # Buffer not found
+            # Buffer not found; enumeration succeeded, so retrying won't help
             return -1, None
             
         except pylink.errors.JLinkRTTException as e:
@@ -174,55 +227,64 @@ def find_buffer_by_name(jlink, name, up=True, max_retries=3):
     return -1, None
 
 
-def print_buffers(jlink):
+def print_buffers(jlink, rtt_active=None):
     """Print the list of available RTT buffers.
     
     Args:
         jlink: pylink.JLink instance
+        rtt_active: Callable from make_rtt_active_check() (built from jlink if None)
         
     Returns:
         bool: True if buffers were printed successfully, False otherwise
     """
+    if rtt_active is None:
+        rtt_active = make_rtt_active_check(jlink)
+    
     try:
-        if not is_rtt_active(jlink):
+        if not rtt_active():
             print("Error: RTT is not active", file=sys.stderr)
             return False
         
-        print("Up-buffers:")
+        # Each section is collected and printed with a single write
+        lines = ["Up-buffers:"]
         try:
             num_up = jlink.rtt_get_num_up_buffers()
             if num_up == 0:
-                print("  (none)")
+                lines.append("  (none)")
             else:
                 for i in range(num_up):
                     try:
                         desc = jlink.rtt_get_buf_descriptor(i, True)
                         if desc:
                             name = desc.name.rstrip('\x00') if isinstance(desc.name, str) else desc.name.decode('utf-8', errors='replace').rstrip('\x00')
-                            print(f"  #{i} {name} (size={desc.SizeOfBuffer})")
+                            lines.append(f"  #{i} {name} (size={desc.SizeOfBuffer})")
                     except (pylink.errors.JLinkRTTException, UnicodeDecodeError, AttributeError) as e:
-                        print(f"  #{i} (error reading descriptor: {e})")
+                        lines.append(f"  #{i} (error reading descriptor: {e})")
         except pylink.errors.JLinkRTTException as e:
+            print("\n".join(lines))
             print(f"  Error reading up-buffers: {e}", file=sys.stderr)
             return False
+        print("\n".join(lines))
         
-        print("Down-buffers:")
+        lines = ["Down-buffers:"]
         try:
             num_down = jlink.rtt_get_num_down_buffers()
             if num_down == 0:
-                print("  (none)")
+                lines.append("  (none)")
             else:
                 for i in range(num_down):
                     try:
                         desc = jlink.rtt_get_buf_descriptor(i, False)
                         if desc:
                             name = desc.name.rstrip('\x00') if isinstance(desc.name, str) else desc.name.decode('utf-8', errors='replace').rstrip('\x00')
-                            print(f"  #{i} {name} (size={desc.SizeOfBuffer})")
+                            lines.append(f"  #{i} {name} (size={desc.SizeOfBuffer})")
                     except (pylink.errors.JLinkRTTException, UnicodeDecodeError, AttributeError) as e:
-                        print(f"  #{i} (error reading descriptor: {e})")
+                        lines.append(f"  #{i} (error reading descriptor: {e})")
         except pylink.errors.JLinkRTTException as e:
+            print("\n".join(lines))
             print(f"  Error reading down-buffers: {e}", file=sys.stderr)
             return False
+        print("\n".join(lines))
         
         return True
         
@@ -250,44 +312,53 @@ def verify_jlink_connection(jlink):
         if not jlink.target_connected():
             raise RTTBridgeError("Target device is not connected")
         
-        # Try to get device info to verify connection
-        try:
-            _ = jlink.product_name
-            _ = jlink.serial_number
-        except Exception as e:
-            raise RTTBridgeError(f"Failed to get J-Link device information: {e}")
-            
     except pylink.errors.JLinkException as e:
         raise RTTBridgeError(f"J-Link connection error: {e}")
 
 
-def is_rtt_active(jlink):
-    """Check if RTT is active by attempting to get buffer count.
+def make_rtt_active_check(jlink):
+    """Build a callable that checks whether RTT is active.
+    
+    Whether the installed pylink provides rtt_is_active() is resolved once
+    here, so callers that poll RTT state do not repeat the lookup.
     
     Args:
         jlink: pylink.JLink instance
         
     Returns:
-        bool: True if RTT is active, False otherwise
+        callable: Function taking no arguments that returns True if RTT is
+        active, False otherwise
     """
-    try:
-        # Try to use rtt_is_active if available
-        if hasattr(jlink, 'rtt_is_active'):
-            return jlink.rtt_is_active()
-        # Fallback: try to get buffer count
-        num_buffers = jlink.rtt_get_num_up_buffers()
-        return num_buffers > 0
-    except (pylink.errors.JLinkRTTException, AttributeError):
-        return False
-    except Exception:
-        return False
+    if hasattr(jlink, 'rtt_is_active'):
+        check = jlink.rtt_is_active
+    else:
+        # Fallback: RTT is considered active once up-buffers are reported
+        get_num_up_buffers = jlink.rtt_get_num_up_buffers
+        
+        def check():
+            return get_num_up_buffers() > 0
+    
+    def rtt_active():
+        try:
+            return check()
+        except (pylink.errors.JLinkRTTException, AttributeError):
+            return False
+        except Exception:
+            return False
+    
+    return rtt_active
 
 
 def create_pty():
-    """Create a pseudo-terminal pair.
+    """Create a pseudo-terminal.
+    
+    The master side is switched to non-blocking mode and the slave side is
+    closed again once its name is known: consumers open the slave by name,
+    and leaving our own copy open would keep the master from ever seeing
+    EIO when no consumer is attached.
     
     Returns:
-        tuple: (master_fd, slave_fd, pty_name)
+        tuple: (master_fd, pty_name)
         
     Raises:
         RTTBridgeError: If PTY creation fails
@@ -307,7 +378,14 @@ def create_pty():
             os.close(slave_fd)
             raise RTTBridgeError(f"Failed to get PTY name: {e}")
         
-        return master_fd, slave_fd, pty_name
+        os.close(slave_fd)
+        try:
+            os.set_blocking(master_fd, False)
+        except OSError:
+            os.close(master_fd)
+            raise
+        
+        return master_fd, pty_name
         
     except OSError as e:
         raise RTTBridgeError(f"Failed to create PTY: {e}")
@@ -324,9 +402,14 @@ def create_symlink(target, link_path):
         RTTBridgeError: If symlink creation fails
     """
     try:
-        # Remove existing symlink or file if it exists
-        if os.path.exists(link_path):
-            if os.path.islink(link_path):
+        # Remove an existing symlink, including a dangling one left behind
+        # by a previous run; lstat() does not follow the link
+        try:
+            st = os.lstat(link_path)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            if stat.S_ISLNK(st.st_mode):
                 os.remove(link_path)
             else:
                 raise RTTBridgeError(f"Path exists and is not a symlink: {link_path}")
@@ -345,390 +428,636 @@ def create_symlink(target, link_path):
         raise RTTBridgeError(f"Failed to create symlink '{link_path}': {e}")
 
 
-def main():
-    """Main program function."""
-    parser = argparse.ArgumentParser(
-        description='RTT to PTY bridge using pylink',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  # List available buffers
-  %(prog)s -d NRF54L15_M33 -p
-  
-  # Basic RTT to PTY bridge
-  %(prog)s -d NRF54L15_M33 -b Terminal
-  
-  # With specific RTT address
-  %(prog)s -d NRF54L15_M33 -a 0x200044E0
-  
-  # With search range
-  %(prog)s -d NRF54L15_M33 -a 0x20000000,0x2003FFFF
-  
-  # Bidirectional communication
-  %(prog)s -d NRF54L15_M33 -b Terminal --bidir
-        """
-    )
-    parser.add_argument('-d', '--device', default='NRF54L15_M33', 
-                       help='Device name (default: NRF54L15_M33)')
-    parser.add_argument('-s', '--serial', type=int, 
-                       help='J-Link serial number')
-    parser.add_argument('-S', '--speed', type=int, default=4000, 
-                       help='SWD/JTAG speed in kHz (default: 4000)')
-    parser.add_argument('-b', '--buffer', default='Terminal', 
-                       help='Buffer name to use (default: Terminal)')
-    parser.add_argument('-2', '--bidir', action='store_true', 
-                       help='Enable bidirectional communication')
-    parser.add_argument('-a', '--address', 
-                       help='RTT address (hex) or search range (start,size)')
-    parser.add_argument('-l', '--link', 
-                       help='Create symlink to PTY at this path')
-    parser.add_argument('-p', '--print-bufs', action='store_true', 
-                       help='Print list of available buffers and exit')
+class RTTBridge:
+    """RTT to PTY bridge.
     
-    args = parser.parse_args()
+    Connects to the J-Link, starts RTT, creates the PTY and moves data
+    between them until stop() is called or the connection fails. start()
+    blocks, so callers that need the PTY while the bridge runs (such as the
+    integration test) run it in a thread and wait on pty_ready.
     
-    # Validate arguments
-    try:
-        validate_speed(args.speed)
-    except ValueError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return 1
-    
-    if args.address:
-        try:
-            address_info = parse_address(args.address)
-        except ValueError as e:
-            print(f"Error: Invalid address format: {e}", file=sys.stderr)
-            return 1
-    
-    if not args.buffer or not args.buffer.strip():
-        print("Error: Buffer name cannot be empty", file=sys.stderr)
-        return 1
-    
-    jlink = None
-    master_fd = None
-    slave_fd = None
-    symlink_path = None
+    Attributes:
+        pty_path: Name of the PTY, or None until it has been created
+        pty_ready: threading.Event set once the PTY exists, and also when
+            start() returns so that waiters are never left hanging
+        exit_code: Exit status returned by start(), or None while running
+    """
     
-    try:
-        # Connect to J-Link
-        try:
-            jlink = pylink.JLink()
-        except Exception as e:
-            print(f"Error: Failed to create J-Link instance: {e}", file=sys.stderr)
-            return 1
+    def __init__(self, device='NRF54L15_M33', buffer='Terminal', serial=None,
+                 speed=4000, bidir=False, address=None, link=None,
+                 print_bufs=False):
+        """Validate the bridge configuration.
         
-        print("Connecting to J-Link...")
-        try:
-            if args.serial:
-                jlink.open(serial_no=args.serial)
+        Args:
+            device: Target device name
+            buffer: RTT buffer name to bridge
+            serial: J-Link serial number (None for the first J-Link found)
+            speed: SWD/JTAG speed in kHz
+            bidir: Also forward PTY input to the RTT down-buffer
+            address: RTT address (hex) or search range (start,size)
+            link: Path of a symlink to create for the PTY
+            print_bufs: Print the available buffers instead of bridging
+            
+        Raises:
+            ValueError: If speed, address or buffer name is invalid
+        """
+        validate_speed(speed)
+        
+        # Parsed once here and reused when RTT is started
+        self.rtt_block_address = None
+        self.rtt_search_range = None
+        if address:
+            try:
+                start, size = parse_address(address)
+            except ValueError as e:
+                raise ValueError(f"Invalid address format: {e}")
+            if size is None:
+                self.rtt_block_address = start
             else:
-                jlink.open()
-        except pylink.errors.JLinkException as e:
-            print(f"Error: Failed to open J-Link: {e}", file=sys.stderr)
-            if "No J-Link found" in str(e) or "No connection" in str(e):
-                print("Hint: Ensure J-Link is connected and drivers are installed", file=sys.stderr)
-            return 1
+                self.rtt_search_range = (start, size)
         
-        try:
-            if not jlink.opened():
-                raise RTTBridgeError("J-Link DLL is not open")
-        except RTTBridgeError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            if jlink:
-                jlink.close()
-            return 1
+        if not buffer or not buffer.strip():
+            raise ValueError("Buffer name cannot be empty")
         
-        print(f"Connecting to {args.device}...")
-        try:
-            jlink.set_tif(pylink.enums.JLinkInterfaces.SWD)
-            jlink.set_speed(args.speed)
-            jlink.connect(args.device)
-        except pylink.errors.JLinkException as e:
-            print(f"Error: Failed to connect to device '{args.device}': {e}", file=sys.stderr)
-            if jlink:
-                jlink.close()
-            return 1
+        self.device = device
+        self.buffer = buffer
+        self.serial = serial
+        self.speed = speed
+        self.bidir = bidir
+        self.link = link
+        self.print_bufs = print_bufs
         
-        # Verify connection after device connect
-        try:
-            verify_jlink_connection(jlink)
-        except RTTBridgeError as e:
-            print(f"Error: Connection verification failed: {e}", file=sys.stderr)
-            if jlink:
-                jlink.close()
-            return 1
+        self.pty_path = None
+        self.pty_ready = threading.Event()
+        self.exit_code = None
         
-        print("Connected to:")
-        try:
-            print(f"  {jlink.product_name}")
-            print(f"  S/N: {jlink.serial_number}")
-        except Exception as e:
-            print(f"  (device info unavailable: {e})")
+        self._stop = threading.Event()
+        self._wakeup_lock = threading.RLock()
+        self._wakeup_w = None
+    
+    def start(self):
+        """Run the bridge until it is stopped or fails.
         
-        # Configure RTT
-        print("Configuring RTT...")
+        Returns:
+            int: Exit status (0 on clean shutdown)
+        """
         try:
-            if args.address:
-                address_info = parse_address(args.address)
-                if address_info[1] is not None:
-                    # Search range
-                    start, size = address_info
-                    print(f"Using RTT search range: 0x{start:X}, 0x{size:X}")
-                    jlink.rtt_start(search_ranges=[(start, size)])
-                else:
-                    # Specific address
-                    addr = address_info[0]
-                    print(f"Using RTT address: 0x{addr:X}")
-                    jlink.rtt_start(block_address=addr)
-            else:
-                print("Using auto-detection for RTT control block...")
-                jlink.rtt_start()
-        except (pylink.errors.JLinkException, ValueError) as e:
-            print(f"Error: Failed to start RTT: {e}", file=sys.stderr)
-            if jlink:
-                jlink.close()
-            return 1
-        
-        print("Searching for RTT control block...")
-        time.sleep(0.5)  # Wait for RTT to initialize
+            self.exit_code = self._run()
+        finally:
+            self.pty_ready.set()
+        return self.exit_code
+    
+    def stop(self):
+        """Ask a running bridge to shut down.
         
-        # Verify RTT is active
-        max_rtt_wait = 5.0
-        rtt_wait_start = time.time()
-        while not is_rtt_active(jlink):
-            if time.time() - rtt_wait_start > max_rtt_wait:
-                print("Error: RTT control block not found after timeout", file=sys.stderr)
-                print("Hint: Ensure firmware has RTT enabled and device is running", file=sys.stderr)
-                if jlink:
-                    try:
-                        jlink.rtt_stop()
-                    except:
-                        pass
-                    jlink.close()
-                return 1
-            time.sleep(0.2)
+        Safe to call from another thread or from a signal handler.
+        """
+        self._stop.set()
+        with self._wakeup_lock:
+            if self._wakeup_w is not None:
+                try:
+                    os.write(self._wakeup_w, b'\0')
+                except OSError:
+                    pass
+    
+    def _install_signal_handlers(self):
+        """Route SIGINT, SIGTERM and SIGQUIT to stop().
         
-        # Print buffers if requested
-        if args.print_bufs:
-            success = print_buffers(jlink)
-            if jlink:
-                jlink.close()
-            return 0 if success else 1
+        Signal handlers can only be installed from the main thread; a bridge
+        running in any other thread is stopped through stop() alone.
         
-        # Find buffers
-        try:
-            index_up, desc_up = find_buffer_by_name(jlink, args.buffer, up=True)
-        except RTTBridgeError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            print("\nAvailable buffers:", file=sys.stderr)
-            print_buffers(jlink)
-            if jlink:
-                jlink.close()
-            return 1
+        Returns:
+            dict: Previous handler for each signal (empty if none installed)
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
         
-        if index_up < 0:
-            print(f"Error: Failed to find matching up-buffer '{args.buffer}'", 
-                  file=sys.stderr)
-            print("\nAvailable buffers:", file=sys.stderr)
-            print_buffers(jlink)
-            if jlink:
-                jlink.close()
-            return 1
+        def signal_handler(signum, frame):
+            print("\nShutting down...", file=sys.stderr)
+            self.stop()
         
-        print(f"Using up-buffer #{index_up} '{args.buffer}' (size={desc_up.SizeOfBuffer})")
+        previous_handlers = {}
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGQUIT):
+            previous_handlers[signum] = signal.signal(signum, signal_handler)
+        return previous_handlers
+    
+    def _run(self):
+        """Connect, bridge and clean up; see start()."""
+        jlink = None
+        master_fd = None
+        symlink_path = None
         
-        index_down = -1
-        desc_down = None
-        if args.bidir:
+        try:
+            # Connect to J-Link
+            try:
+                jlink = pylink.JLink()
+            except Exception as e:
+                print(f"Error: Failed to create J-Link instance: {e}", file=sys.stderr)
+                return 1
+            
+            print("Connecting to J-Link...")
+            try:
+                if self.serial:
+                    jlink.open(serial_no=self.serial)
+                else:
+                    jlink.open()
+            except pylink.errors.JLinkException as e:
+                print(f"Error: Failed to open J-Link: {e}", file=sys.stderr)
+                if "No J-Link found" in str(e) or "No connection" in str(e):
+                    print("Hint: Ensure J-Link is connected and drivers are installed", file=sys.stderr)
+                return 1
+            
+            try:
+                if not jlink.opened():
+                    raise RTTBridgeError("J-Link DLL is not open")
+            except RTTBridgeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                if jlink:
+                    jlink.close()
+                return 1
+            
+            print(f"Connecting to {self.device}...")
+            try:
+                jlink.set_tif(pylink.enums.JLinkInterfaces.SWD)
+                jlink.set_speed(self.speed)
+                jlink.connect(self.device)
+            except pylink.errors.JLinkException as e:
+                print(f"Error: Failed to connect to device '{self.device}': {e}", file=sys.stderr)
+                if jlink:
+                    jlink.close()
+                return 1
+            
+            # Verify connection after device connect
+            try:
+                verify_jlink_connection(jlink)
+            except RTTBridgeError as e:
+                print(f"Error: Connection verification failed: {e}", file=sys.stderr)
+                if jlink:
+                    jlink.close()
+                return 1
+            
+            print("Connected to:")
+            try:
+                product_name = jlink.product_name
+                serial_number = jlink.serial_number
+                print(f"  {product_name}")
+                print(f"  S/N: {serial_number}")
+            except Exception as e:
+                print(f"  (device info unavailable: {e})")
+            
+            # Configure RTT
+            print("Configuring RTT...")
+            try:
+                if self.rtt_search_range is not None:
+                    print(f"Using RTT search range: 0x{self.rtt_search_range[0]:X}, 0x{self.rtt_search_range[1]:X}")
+                    jlink.rtt_start(search_ranges=[self.rtt_search_range])
+                elif self.rtt_block_address is not None:
+                    print(f"Using RTT address: 0x{self.rtt_block_address:X}")
+                    jlink.rtt_start(block_address=self.rtt_block_address)
+                else:
+                    print("Using auto-detection for RTT control block...")
+                    jlink.rtt_start()
+            except (pylink.errors.JLinkException, ValueError) as e:
+                print(f"Error: Failed to start RTT: {e}", file=sys.stderr)
+                if jlink:
+                    jlink.close()
+                return 1
+            
+            print("Searching for RTT control block...")
+            
+            # Wait for RTT to become active, polling quickly at first and backing
+            # off exponentially so slow targets don't see extra DLL traffic
+            max_rtt_wait = 5.0
+            rtt_wait_deadline = time.monotonic() + max_rtt_wait
+            rtt_wait_delay = 0.002
+            rtt_active = make_rtt_active_check(jlink)
+            while not rtt_active():
+                if time.monotonic() > rtt_wait_deadline:
+                    print("Error: RTT control block not found after timeout", file=sys.stderr)
+                    print("Hint: Ensure firmware has RTT enabled and device is running", file=sys.stderr)
+                    if jlink:
+                        try:
+                            jlink.rtt_stop()
+                        except:
+                            pass
+                        jlink.close()
+                    return 1
+                time.sleep(rtt_wait_delay)
+                rtt_wait_delay = min(rtt_wait_delay * 2, 0.2)
+            
+            # Print buffers if requested
+            if self.print_bufs:
+                success = print_buffers(jlink, rtt_active)
+                if jlink:
+                    jlink.close()
+                return 0 if success else 1
+            
+            # Find buffers
             try:
-                index_down, desc_down = find_buffer_by_name(jlink, args.buffer, up=False)
+                index_up, desc_up = find_buffer_by_name(jlink, self.buffer, up=True,
+                                                       rtt_active=rtt_active)
             except RTTBridgeError as e:
                 print(f"Error: {e}", file=sys.stderr)
                 print("\nAvailable buffers:", file=sys.stderr)
-                print_buffers(jlink)
+                print_buffers(jlink, rtt_active)
                 if jlink:
                     jlink.close()
                 return 1
             
-            if index_down < 0:
-                print(f"Error: Failed to find matching down-buffer '{args.buffer}'", 
+            if index_up < 0:
+                print(f"Error: Failed to find matching up-buffer '{self.buffer}'", 
                       file=sys.stderr)
                 print("\nAvailable buffers:", file=sys.stderr)
-                print_buffers(jlink)
+                print_buffers(jlink, rtt_active)
                 if jlink:
                     jlink.close()
                 return 1
-            print(f"Using down-buffer #{index_down} '{args.buffer}' (size={desc_down.SizeOfBuffer})")
-        
-        # Create PTY
-        try:
-            master_fd, slave_fd, pty_name = create_pty()
-        except RTTBridgeError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            if jlink:
-                jlink.close()
-            return 1
-        
-        print(f"PTY name is {pty_name}")
-        
-        # Create symlink if requested
-        if args.link:
-            try:
-                create_symlink(pty_name, args.link)
-                symlink_path = args.link
-                print(f"Created symlink {args.link} -> {pty_name}")
-            except RTTBridgeError as e:
-                print(f"Warning: {e}", file=sys.stderr)
-                print("Continuing without symlink...", file=sys.stderr)
-        
-        # Configure signals for clean exit
-        do_exit = False
-        
-        def signal_handler(signum, frame):
-            nonlocal do_exit
-            do_exit = True
-            print("\nShutting down...", file=sys.stderr)
-        
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        signal.signal(signal.SIGQUIT, signal_handler)
-        
-        # Main loop
-        print("RTT bridge active. Press Ctrl+C to exit.")
-        consecutive_errors = 0
-        max_consecutive_errors = 10
-        
-        try:
-            while not do_exit:
-                # Verify connection is still valid
+            
+            print(f"Using up-buffer #{index_up} '{self.buffer}' (size={desc_up.SizeOfBuffer})")
+            
+            index_down = -1
+            desc_down = None
+            if self.bidir:
                 try:
-                    if not jlink.connected() or not jlink.target_connected():
-                        print("\nError: Connection lost", file=sys.stderr)
-                        break
-                except Exception:
-                    print("\nError: Connection check failed", file=sys.stderr)
-                    break
+                    index_down, desc_down = find_buffer_by_name(jlink, self.buffer, up=False,
+                                                               rtt_active=rtt_active)
+                except RTTBridgeError as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    print("\nAvailable buffers:", file=sys.stderr)
+                    print_buffers(jlink, rtt_active)
+                    if jlink:
+                        jlink.close()
+                    return 1
                 
-                # Read from RTT and write to PTY
+                if index_down < 0:
+                    print(f"Error: Failed to find matching down-buffer '{self.buffer}'", 
+                          file=sys.stderr)
+                    print("\nAvailable buffers:", file=sys.stderr)
+                    print_buffers(jlink, rtt_active)
+                    if jlink:
+                        jlink.close()
+                    return 1
+                print(f"Using down-buffer #{index_down} '{self.buffer}' (size={desc_down.SizeOfBuffer})")
+            
+            # Create PTY
+            try:
+                master_fd, pty_name = create_pty()
+            except RTTBridgeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                if jlink:
+                    jlink.close()
+                return 1
+            
+            print(f"PTY name is {pty_name}")
+            
+            # Create symlink if requested
+            if self.link:
                 try:
-                    data = jlink.rtt_read(index_up, 4096)
-                    if data:
+                    create_symlink(pty_name, self.link)
+                    symlink_path = self.link
+                    print(f"Created symlink {self.link} -> {pty_name}")
+                except RTTBridgeError as e:
+                    print(f"Warning: {e}", file=sys.stderr)
+                    print("Continuing without symlink...", file=sys.stderr)
+            
+            self.pty_path = pty_name
+            self.pty_ready.set()
+            
+            # Configure signals for clean exit
+            previous_handlers = self._install_signal_handlers()
+            
+            # Main loop
+            print("RTT bridge active. Press Ctrl+C to exit.")
+            consecutive_errors = 0
+            max_consecutive_errors = 10
+            
+            # The selector wait at the end of each iteration is the only place
+            # the loop sleeps. Its timeout is 0 while data is flowing and grows
+            # with the time since the last transfer while idle, so an idle bridge
+            # backs off to one wakeup every IDLE_POLL_MAX seconds. The PTY is
+            # registered once, so each wait is a single epoll/kqueue call.
+            selector = selectors.DefaultSelector()
+            if self.bidir and index_down >= 0:
+                selector.register(master_fd, selectors.EVENT_READ)
+            
+            # stop() and signals write a byte to this pipe, so a shutdown
+            # request wakes the selector straight away instead of when its
+            # timeout expires.
+            wakeup_r, wakeup_w = os.pipe()
+            os.set_blocking(wakeup_r, False)
+            os.set_blocking(wakeup_w, False)
+            if previous_handlers:
+                signal.set_wakeup_fd(wakeup_w)
+            selector.register(wakeup_r, selectors.EVENT_READ)
+            with self._wakeup_lock:
+                self._wakeup_w = wakeup_w
+            
+            last_data_ts = time.monotonic()
+            pty_active = False
+            pty_detached = False
+            
+            # connected()/target_connected() are DLL round-trips, so only check
+            # the connection once per HEALTH_CHECK_INTERVAL, or straight away
+            # after a J-Link error.
+            next_health_check = last_data_ts + HEALTH_CHECK_INTERVAL
+            
+            # rtt_read() returns a list of ints; copy it into one reusable buffer
+            # and write a view of that instead of building a new bytes object
+            # for every read. Consecutive reads are drained into the buffer back
+            # to back so a burst reaches the PTY in a single write.
+            scratch = bytearray(RTT_DRAIN_MAX_BYTES)
+            scratch_view = memoryview(scratch)
+            # scratch[written:filled] has been drained but not yet accepted by
+            # the (non-blocking) PTY
+            filled = written = 0
+            
+            # PTY input is read into a buffer of its own, also allocated once
+            pty_buf = bytearray(PTY_READ_SIZE)
+            pty_view = memoryview(pty_buf)
+            
+            try:
+                while not self._stop.is_set():
+                    # One clock read per iteration serves every deadline below
+                    now = time.monotonic()
+                    
+                    # Verify connection is still valid
+                    if now >= next_health_check:
                         try:
-                            bytes_written = os.write(master_fd, bytes(data))
-                            if bytes_written != len(data):
-                                print(f"\nWarning: Partial write to PTY: {bytes_written}/{len(data)} bytes", 
-                                      file=sys.stderr)
+                            if not jlink.connected() or not jlink.target_connected():
+                                print("\nError: Connection lost", file=sys.stderr)
+                                break
+                        except Exception:
+                            print("\nError: Connection check failed", file=sys.stderr)
+                            break
+                        next_health_check = now + HEALTH_CHECK_INTERVAL
+                    
+                    active = False
+                    
+                    # Read from RTT until the up-buffer is empty, scratch is full
+                    # or the drain has used up its time slice. While the previous
+                    # drain is still waiting for the PTY, leave new data in the
+                    # target's up-buffer.
+                    if written == filled:
+                        filled = written = 0
+                        drain_deadline = now + RTT_DRAIN_MAX_TIME
+                        try:
+                            while filled < RTT_DRAIN_MAX_BYTES:
+                                data = jlink.rtt_read(index_up,
+                                                      min(RTT_READ_SIZE, RTT_DRAIN_MAX_BYTES - filled))
+                                n = len(data)
+                                if not n:
+                                    break
+                                scratch[filled:filled + n] = data
+                                filled += n
+                                if n < RTT_READ_SIZE:
+                                    # Short read: the up-buffer has been drained
+                                    break
+                                if time.monotonic() >= drain_deadline:
+                                    break
+                        except pylink.errors.JLinkRTTException:
+                            # No data available, this is normal
+                            consecutive_errors = 0
+                            pass
+                        except pylink.errors.JLinkException as e:
+                            consecutive_errors += 1
+                            if consecutive_errors >= max_consecutive_errors:
+                                print(f"\nError: Too many consecutive J-Link errors: {e}", file=sys.stderr)
+                                break
+                            next_health_check = 0
+                    
+                    # Write as much of the drained data as the PTY will take
+                    if written < filled:
+                        try:
+                            written += os.write(master_fd, scratch_view[written:filled])
+                            active = True
                             consecutive_errors = 0
+                        except BlockingIOError:
+                            # PTY buffer is full; retry the rest next iteration
+                            pass
                         except OSError as e:
                             if e.errno == errno.EBADF:
                                 print("\nError: PTY file descriptor invalid", file=sys.stderr)
                                 break
-                            raise
-                except pylink.errors.JLinkRTTException:
-                    # No data available, this is normal
-                    consecutive_errors = 0
-                    pass
-                except pylink.errors.JLinkException as e:
-                    consecutive_errors += 1
-                    if consecutive_errors >= max_consecutive_errors:
-                        print(f"\nError: Too many consecutive J-Link errors: {e}", file=sys.stderr)
-                        break
-                    time.sleep(0.1)
-                    continue
-                
-                # If bidirectional, read from PTY and write to RTT
-                if args.bidir and index_down >= 0:
-                    try:
-                        ready, _, _ = select.select([master_fd], [], [], 0.1)
-                        if ready:
-                            try:
-                                data = os.read(master_fd, 4096)
-                                if data:
-                                    try:
-                                        bytes_written = jlink.rtt_write(index_down, list(data))
-                                        if bytes_written != len(data):
-                                            print(f"\nWarning: Partial write to RTT: {bytes_written}/{len(data)} bytes", 
-                                                  file=sys.stderr)
-                                    except pylink.errors.JLinkRTTException as e:
-                                        print(f"\nWarning: Failed to write to RTT buffer: {e}", file=sys.stderr)
-                            except OSError as e:
-                                if e.errno == errno.EBADF:
-                                    print("\nError: PTY file descriptor invalid", file=sys.stderr)
-                                    break
-                                elif e.errno == errno.EIO:
-                                    # PTY closed by slave
-                                    print("\nPTY closed by slave", file=sys.stderr)
-                                    break
+                            elif e.errno != errno.EIO:
                                 raise
-                    except select.error as e:
-                        if e.args[0] == errno.EBADF:
+                            # EIO: no process has the slave open; retry later
+                    
+                    # Work out how long to wait before the next RTT poll
+                    if active or pty_active:
+                        last_data_ts = now
+                        pty_active = False
+                        timeout = 0
+                    elif consecutive_errors:
+                        timeout = IDLE_POLL_MAX
+                    else:
+                        timeout = min(max(now - last_data_ts, IDLE_POLL_MIN), IDLE_POLL_MAX)
+                    
+                    # Wait for PTY input (bidirectional mode) or the poll timeout
+                    try:
+                        events = selector.select(timeout)
+                    except InterruptedError:
+                        continue
+                    except OSError as e:
+                        if e.errno == errno.EBADF:
                             print("\nError: Invalid file descriptor in select", file=sys.stderr)
                             break
                         raise
-                else:
-                    time.sleep(0.1)
-        
-        except KeyboardInterrupt:
-            pass
-        except Exception as e:
-            print(f"\nUnexpected error in main loop: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc()
-        finally:
-            print("Cleaning up...", file=sys.stderr)
-            
-            # Stop RTT
-            if jlink:
-                try:
-                    jlink.rtt_stop()
-                except Exception as e:
-                    print(f"Warning: Failed to stop RTT: {e}", file=sys.stderr)
-            
-            # Close file descriptors
-            if master_fd is not None:
-                try:
-                    os.close(master_fd)
-                except OSError:
-                    pass
+                    
+                    pty_readable = False
+                    for key, _ in events:
+                        if key.fd == wakeup_r:
+                            # Woken by stop() or a signal
+                            try:
+                                os.read(wakeup_r, 64)
+                            except BlockingIOError:
+                                pass
+                        else:
+                            pty_readable = True
+                    if self._stop.is_set():
+                        break
+                    
+                    # If bidirectional, read from PTY and write to RTT. While no
+                    # process has the slave open, reads on the master fail with
+                    # EIO and it polls readable constantly, so it is taken out of
+                    # the selector and probed once per iteration until a reader
+                    # attaches again.
+                    if pty_readable or pty_detached:
+                        try:
+                            n = os.readv(master_fd, [pty_buf])
+                        except BlockingIOError:
+                            n = 0
+                        except OSError as e:
+                            if e.errno == errno.EBADF:
+                                print("\nError: PTY file descriptor invalid", file=sys.stderr)
+                                break
+                            elif e.errno != errno.EIO:
+                                raise
+                            if not pty_detached:
+                                selector.unregister(master_fd)
+                                pty_detached = True
+                            n = None
+                        
+                        if n is not None and pty_detached:
+                            selector.register(master_fd, selectors.EVENT_READ)
+                            pty_detached = False
+                        
+                        if n:
+                            pty_active = True
+                            try:
+                                # rtt_write() copies its argument into a ctypes
+                                # array via bytearray(), so a view of pty_buf
+                                # can be passed as it is.
+                                bytes_written = jlink.rtt_write(index_down, pty_view[:n])
+                                if bytes_written != n:
+                                    print(f"\nWarning: Partial write to RTT: {bytes_written}/{n} bytes", 
+                                          file=sys.stderr)
+                            except pylink.errors.JLinkRTTException as e:
+                                print(f"\nWarning: Failed to write to RTT buffer: {e}", file=sys.stderr)
+                                next_health_check = 0
             
-            if slave_fd is not None:
-                try:
-                    os.close(slave_fd)
-                except OSError:
-                    pass
+            except KeyboardInterrupt:
+                pass
+            except Exception as e:
+                print(f"\nUnexpected error in main loop: {e}", file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                print("Cleaning up...", file=sys.stderr)
+                
+                selector.close()
+                if previous_handlers:
+                    signal.set_wakeup_fd(-1)
+                    for signum, handler in previous_handlers.items():
+                        signal.signal(signum, handler)
+                with self._wakeup_lock:
+                    self._wakeup_w = None
+                    os.close(wakeup_r)
+                    os.close(wakeup_w)
+                
+                # Stop RTT
+                if jlink:
+                    try:
+                        jlink.rtt_stop()
+                    except Exception as e:
+                        print(f"Warning: Failed to stop RTT: {e}", file=sys.stderr)
+                
+                # Close file descriptors
+                if master_fd is not None:
+                    try:
+                        os.close(master_fd)
+                    except OSError:
+                        pass
+                
+                # Remove symlink. The PTY it points to is gone once master_fd is
+                # closed, so check the link itself rather than its target.
+                if symlink_path:
+                    try:
+                        if stat.S_ISLNK(os.lstat(symlink_path).st_mode):
+                            os.remove(symlink_path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"Warning: Failed to remove symlink: {e}", file=sys.stderr)
+                
+                # Close J-Link connection
+                if jlink:
+                    try:
+                        jlink.close()
+                    except Exception as e:
+                        print(f"Warning: Failed to close J-Link: {e}", file=sys.stderr)
             
-            # Remove symlink
-            if symlink_path and os.path.exists(symlink_path):
-                try:
-                    if os.path.islink(symlink_path):
-                        os.remove(symlink_path)
-                except OSError as e:
-                    print(f"Warning: Failed to remove symlink: {e}", file=sys.stderr)
+            return 0
             
-            # Close J-Link connection
-            if jlink:
-                try:
-                    jlink.close()
-                except Exception as e:
-                    print(f"Warning: Failed to close J-Link: {e}", file=sys.stderr)
+        except RTTBridgeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        except pylink.errors.JLinkException as e:
+            print(f"J-Link error: {e}", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            print("\nInterrupted by user", file=sys.stderr)
+            return 130  # Standard exit code for SIGINT
+        except Exception as e:
+            print(f"Unexpected error: {e}", file=sys.stderr)
+            traceback.print_exc()
+            return 1
+
+
+def create_bridge(device='NRF54L15_M33', buffer='Terminal', **kwargs):
+    """Create an RTT to PTY bridge.
+    
+    Args:
+        device: Target device name
+        buffer: RTT buffer name to bridge
+        **kwargs: Further RTTBridge options (serial, speed, bidir, address,
+            link, print_bufs)
         
-        return 0
+    Returns:
+        RTTBridge: Bridge ready to be started with start()
         
-    except RTTBridgeError as e:
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    return RTTBridge(device, buffer, **kwargs)
+
+
+def main():
+    """Main program function."""
+    parser = argparse.ArgumentParser(
+        description='RTT to PTY bridge using pylink',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # List available buffers
+  %(prog)s -d NRF54L15_M33 -p
+  
+  # Basic RTT to PTY bridge
+  %(prog)s -d NRF54L15_M33 -b Terminal
+  
+  # With specific RTT address
+  %(prog)s -d NRF54L15_M33 -a 0x200044E0
+  
+  # With search range
+  %(prog)s -d NRF54L15_M33 -a 0x20000000,0x2003FFFF
+  
+  # Bidirectional communication
+  %(prog)s -d NRF54L15_M33 -b Terminal --bidir
+        """
+    )
+    parser.add_argument('-d', '--device', default='NRF54L15_M33', 
+                       help='Device name (default: NRF54L15_M33)')
+    parser.add_argument('-s', '--serial', type=int, 
+                       help='J-Link serial number')
+    parser.add_argument('-S', '--speed', type=int, default=4000, 
+                       help='SWD/JTAG speed in kHz (default: 4000)')
+    parser.add_argument('-b', '--buffer', default='Terminal', 
+                       help='Buffer name to use (default: Terminal)')
+    parser.add_argument('-2', '--bidir', action='store_true', 
+                       help='Enable bidirectional communication')
+    parser.add_argument('-a', '--address', 
+                       help='RTT address (hex) or search range (start,size)')
+    parser.add_argument('-l', '--link', 
+                       help='Create symlink to PTY at this path')
+    parser.add_argument('-p', '--print-bufs', action='store_true', 
+                       help='Print list of available buffers and exit')
+    
+    args = parser.parse_args()
+    
+    try:
+        bridge = create_bridge(
+            args.device,
+            args.buffer,
+            serial=args.serial,
+            speed=args.speed,
+            bidir=args.bidir,
+            address=args.address,
+            link=args.link,
+            print_bufs=args.print_bufs
+        )
+    except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
-    except pylink.errors.JLinkException as e:
-        print(f"J-Link error: {e}", file=sys.stderr)
-        return 1
-    except KeyboardInterrupt:
-        print("\nInterrupted by user", file=sys.stderr)
-        return 130  # Standard exit code for SIGINT
-    except Exception as e:
-        print(f"Unexpected error: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return 1
+    
+    return bridge.start()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+_worker.py - Warm test interpreter used by run_tests.py --isolated
+
+Usage: _worker.py RESULT_FD
+
+Reads one test script path per line from stdin, runs the script's main()
+in this interpreter and writes one JSON line per script to RESULT_FD:
+
+    {"rc": <exit code>}
+
+Test output goes to the inherited stdout/stderr. The worker exits when
+stdin is closed.
+"""
+
+import os
+import sys
+import json
+import importlib.util
+import traceback
+
+
+def _call_main(path):
+    """Load a test script as a fresh module and run its main().
+    
+    Args:
+        path: Path to the test script
+        
+    Returns:
+        int: Exit code of the script
+    """
+    try:
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.argv = [path]
+        spec.loader.exec_module(module)
+        rc = module.main()
+    except SystemExit as e:
+        rc = e.code
+    except Exception:
+        traceback.print_exc()
+        rc = 1
+    
+    if rc is None:
+        return 0
+    if not isinstance(rc, int):
+        return 1
+    return rc
+
+
+def run_script(path):
+    """Run a test script and flush its output.
+    
+    Args:
+        path: Path to the test script
+        
+    Returns:
+        dict: Exit code of the script
+    """
+    rc = _call_main(path)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return {'rc': rc}
+
+
+def main():
+    """Main function."""
+    results = os.fdopen(int(sys.argv[1]), 'w')
+    
+    for line in sys.stdin:
+        path = line.strip()
+        if not path:
+            continue
+        
+        result = run_script(path)
+        results.write(json.dumps(result) + '\n')
+        results.flush()
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,24 +4,151 @@
 run_tests.py - Test runner for rtt2pty_pylink
 
 Runs all available tests and provides a summary.
+
+By default the test modules are imported and their run() entry points are
+executed in a pool of worker processes, so independent tests run in
+parallel without starting a new interpreter for each one. Use --isolated
+to run the test scripts one at a time through their main() instead, in a
+single long-running worker interpreter (_worker.py) kept separate from the
+runner.
 """
 
 import os
 import sys
 import subprocess
 import argparse
+import importlib
+import multiprocessing
+import functools
+import json
+import selectors
+import struct
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+PY = sys.executable
+
+# Seconds a single test may run before it is reported as timed out
+TEST_TIMEOUT = 60
+
+# Per-test result slot in the pool's shared memory block: (passed, failed)
+RESULT_RECORD = struct.Struct('<II')
 
 
-def run_test(test_script, description, requires_hardware=False):
+@functools.lru_cache(maxsize=None)
+def _script_path(name):
+    """Return the path of a script in the test directory."""
+    return os.path.join(TEST_DIR, name)
+
+
+class TestWorker:
+    """Warm interpreter that runs test scripts sent to it over a pipe.
+    
+    Interpreter and import startup is paid once for all test scripts
+    instead of once per script. The worker is restarted if it dies or a
+    test times out. Results come back on a dedicated pipe, so test output
+    goes straight to the terminal.
+    """
+    
+    def __init__(self):
+        self.process = None
+        self.results = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _start(self):
+        """Start the worker process with its result pipe."""
+        read_fd, write_fd = os.pipe()
+        args = [PY, _script_path('_worker.py'), str(write_fd)]
+        # Hand the write end over by making it inheritable rather than with
+        # pass_fds, so subprocess can use posix_spawn() instead of fork+exec.
+        # Everything else the runner opens is non-inheritable by default.
+        os.set_inheritable(write_fd, True)
+        try:
+            self.process = subprocess.Popen(args, stdin=subprocess.PIPE,
+                                            text=True, close_fds=False)
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        self.results = os.fdopen(read_fd, 'r')
+    
+    def run(self, test_script, timeout=TEST_TIMEOUT):
+        """Run a test script in the worker.
+        
+        Args:
+            test_script: Path to test script
+            timeout: Timeout in seconds
+            
+        Returns:
+            int: Exit code of the test script
+            
+        Raises:
+            subprocess.TimeoutExpired: If the test does not finish in time
+            RuntimeError: If the worker exits without reporting a result
+        """
+        if self.process is None or self.process.poll() is not None:
+            self.close()
+            self._start()
+        
+        self.process.stdin.write(test_script + '\n')
+        self.process.stdin.flush()
+        
+        with selectors.DefaultSelector() as sel:
+            sel.register(self.results, selectors.EVENT_READ)
+            if not sel.select(timeout):
+                self.process.kill()
+                self.close()
+                raise subprocess.TimeoutExpired(test_script, timeout)
+        
+        line = self.results.readline()
+        if not line:
+            self.close()
+            raise RuntimeError("Test worker exited unexpectedly")
+        
+        return json.loads(line)['rc']
+    
+    def close(self):
+        """Shut down the worker process."""
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+
+
+def run_test(test_script, description, worker, requires_hardware=False):
     """Run a test script.
     
+    Test output goes straight to the terminal.
+    
     Args:
         test_script: Path to test script
         description: Description of the test
+        worker: TestWorker to run the script in
         requires_hardware: Whether test requires hardware
         
     Returns:
-        tuple: (success, output)
+        tuple: (success, output) - output describes why a test could not run
     """
     if not os.path.exists(test_script):
         return False, f"Test script not found: {test_script}"
@@ -29,21 +156,11 @@ def run_test(test_script, description, requires_hardware=False):
     print(f"\n{'=' * 60}")
     print(f"Running: {description}")
     print(f"{'=' * 60}")
+    sys.stdout.flush()
     
     try:
-        result = subprocess.run(
-            [sys.executable, test_script],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
-        
-        return result.returncode == 0, result.stdout + result.stderr
+        returncode = worker.run(test_script, timeout=TEST_TIMEOUT)
+        return returncode == 0, ''
         
     except subprocess.TimeoutExpired:
         return False, "Test timed out"
@@ -51,6 +168,143 @@ def run_test(test_script, description, requires_hardware=False):
         return False, f"Error running test: {e}"
 
 
+def run_test_module(module_name, shm_name=None, index=0):
+    """Run a test module's run() entry point in the current process.
+    
+    Args:
+        module_name: Name of the test module (importable from the test directory)
+        shm_name: Shared memory block to store the result in (None to return it)
+        index: Result slot of this test in the shared memory block
+        
+    Returns:
+        tuple: (success, output), or None if the result went to shared memory
+    """
+    try:
+        module = importlib.import_module(module_name)
+        passed, failed = module.run()
+    except Exception:
+        # The summary only shows pass/fail, so report why the test crashed here
+        traceback.print_exc()
+        raise
+    finally:
+        # Pool workers outlive the test, so don't leave its output buffered
+        sys.stdout.flush()
+        sys.stderr.flush()
+    
+    if shm_name is None:
+        return failed == 0, f"{passed} passed, {failed} failed"
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        RESULT_RECORD.pack_into(shm.buf, index * RESULT_RECORD.size, passed, failed)
+    finally:
+        shm.close()
+    return None
+
+
+def _terminate_pools(executors, futures):
+    """Shut down process pools without waiting for tests still running.
+    
+    Args:
+        executors: ProcessPoolExecutors to stop
+        futures: Futures submitted to them
+    """
+    for future in futures:
+        future.cancel()
+    for executor in executors:
+        executor.shutdown(wait=False)
+    # The pools' workers are this process's only multiprocessing children
+    for process in multiprocessing.active_children():
+        process.terminate()
+
+
+def run_tests_in_pool(tests):
+    """Run tests in parallel in a pool of reusable worker processes.
+    
+    Tests that require hardware are serialized in a dedicated single-worker
+    pool. Tests still running once every lane has used up TEST_TIMEOUT per
+    test it had to run are reported as timed out and their workers are
+    terminated. Workers write their pass/fail counts into a shared memory block
+    instead of pickling results back, when shared memory is available.
+    
+    Args:
+        tests: List of test dictionaries
+        
+    Returns:
+        list: (success, output) tuples in the same order as tests
+    """
+    if not tests:
+        return []
+    
+    for test in tests:
+        print(f"Running: {test['description']}")
+    sys.stdout.flush()
+    
+    results = [None] * len(tests)
+    shm = None
+    if shared_memory is not None:
+        try:
+            shm = shared_memory.SharedMemory(
+                create=True, size=RESULT_RECORD.size * len(tests))
+        except OSError:
+            # No usable /dev/shm (e.g. some containers); return results instead
+            shm = None
+    
+    # Hardware tests share the J-Link, so they run one at a time in a pool of
+    # their own while the remaining tests run in parallel alongside them
+    hardware_count = sum(1 for test in tests if test['requires_hardware'])
+    other_count = len(tests) - hardware_count
+    max_workers = max(1, min(other_count, os.cpu_count() or 1))
+    
+    # Each lane gets TEST_TIMEOUT for every test it has to run in turn
+    rounds = max(hardware_count, -(-other_count // max_workers))
+    timeout = TEST_TIMEOUT * rounds
+    
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    hardware_executor = ProcessPoolExecutor(max_workers=1)
+    timed_out = False
+    try:
+        futures = {}
+        for i, test in enumerate(tests):
+            pool = hardware_executor if test['requires_hardware'] else executor
+            if shm is None:
+                future = pool.submit(run_test_module, test['module'])
+            else:
+                future = pool.submit(run_test_module, test['module'], shm.name, i)
+            futures[future] = i
+        
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    results[i] = (False, f"Error running test: {e}")
+                    continue
+                
+                if shm is not None:
+                    passed, failed = RESULT_RECORD.unpack_from(
+                        shm.buf, i * RESULT_RECORD.size)
+                    result = (failed == 0, f"{passed} passed, {failed} failed")
+                results[i] = result
+        except FuturesTimeoutError:
+            timed_out = True
+            for i, result in enumerate(results):
+                if result is None:
+                    results[i] = (False, "Test timed out")
+    finally:
+        if timed_out:
+            _terminate_pools((executor, hardware_executor), futures)
+        else:
+            executor.shutdown()
+            hardware_executor.shutdown()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    
+    return results
+
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(
@@ -61,19 +315,21 @@ def main():
                        help='Skip tests that require hardware')
     parser.add_argument('--basic-only', action='store_true',
                        help='Run only basic PTY tests (no hardware required)')
+    parser.add_argument('--isolated', action='store_true',
+                       help='Run test scripts one at a time in a separate worker interpreter')
     
     args = parser.parse_args()
     
-    test_dir = os.path.dirname(os.path.abspath(__file__))
-    
     tests = [
         {
-            'script': os.path.join(test_dir, 'test_pty_basic.py'),
+            'script': _script_path('test_pty_basic.py'),
+            'module': 'test_pty_basic',
             'description': 'Basic PTY Functionality Tests',
             'requires_hardware': False
         },
         {
-            'script': os.path.join(test_dir, 'test_integration.py'),
+            'script': _script_path('test_integration.py'),
+            'module': 'test_integration',
             'description': 'Integration Test (requires J-Link)',
             'requires_hardware': True
         },
@@ -82,19 +338,25 @@ def main():
     if args.basic_only:
         tests = [t for t in tests if not t['requires_hardware']]
     
+    if args.skip_hardware:
+        for test in tests:
+            if test['requires_hardware']:
+                print(f"\nSkipping {test['description']} (requires hardware)")
+        tests = [t for t in tests if not t['requires_hardware']]
+    
+    if args.isolated:
+        with TestWorker() as worker:
+            outcomes = [
+                run_test(test['script'], test['description'], worker,
+                         test['requires_hardware'])
+                for test in tests
+            ]
+    else:
+        outcomes = run_tests_in_pool(tests)
+    
     results = []
     
-    for test in tests:
-        if args.skip_hardware and test['requires_hardware']:
-            print(f"\nSkipping {test['description']} (requires hardware)")
-            continue
-        
-        success, output = run_test(
-            test['script'],
-            test['description'],
-            test['requires_hardware']
-        )
-        
+    for test, (success, output) in zip(tests, outcomes):
         results.append({
             'name': test['description'],
             'success': success,
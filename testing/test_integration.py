@@ -4,37 +4,32 @@
 test_integration.py - Integration test for rtt2pty_pylink
 
 This script performs end-to-end testing of the rtt2pty_pylink bridge:
-1. Starts rtt2pty_pylink in the background
-2. Reads from the created PTY
-3. Optionally writes to the PTY (if bidirectional)
-4. Validates data flow
+1. Starts the rtt2pty_pylink bridge in a background thread
+2. Checks the PTY symlink and that it is removed on shutdown
+3. Reads from the created PTY
+4. Optionally writes to the PTY (if bidirectional)
+5. Validates data flow
 """
 
 import os
 import sys
 import time
-import subprocess
-import signal
-import tempfile
+import selectors
+import threading
 import argparse
+import contextlib
+import tempfile
 import errno
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def find_pty_from_output(output_lines):
-    """Extract PTY path from rtt2pty_pylink output.
-    
-    Args:
-        output_lines: List of output lines from rtt2pty_pylink
-        
-    Returns:
-        str: PTY path or None if not found
-    """
-    for line in output_lines:
-        if 'PTY name is' in line:
-            parts = line.split('PTY name is')
-            if len(parts) > 1:
-                return parts[1].strip()
-    return None
+import rtt2pty_pylink
+
+# Initial capture buffer size for PTY reads; grown on demand
+CAPTURE_INITIAL_SIZE = 1 << 20
+
+# Maximum bytes requested per read while draining the PTY
+READ_SIZE = 1 << 16
 
 
 def test_pty_read(pty_path, timeout=5):
@@ -56,27 +51,41 @@ def test_pty_read(pty_path, timeout=5):
         print(f"Error opening PTY: {e}", file=sys.stderr)
         return False, None
     
-    data = bytearray()
-    start_time = time.time()
+    buf = bytearray(CAPTURE_INITIAL_SIZE)
+    pos = 0
+    deadline = time.monotonic() + timeout
     
     try:
-        import select
-        while (time.time() - start_time) < timeout:
-            ready, _, _ = select.select([fd], [], [], 0.5)
-            if ready:
-                chunk = os.read(fd, 4096)
-                if chunk:
-                    data.extend(chunk)
-                else:
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            eof = False
+            while not eof:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     break
-            time.sleep(0.1)
+                if not sel.select(timeout=remaining):
+                    continue
+                # Drain everything available before waiting again
+                while True:
+                    if pos == len(buf):
+                        buf.extend(bytes(len(buf)))
+                    try:
+                        with memoryview(buf) as view:
+                            n = os.readv(fd, [view[pos:pos + READ_SIZE]])
+                    except BlockingIOError:
+                        break
+                    if not n:
+                        eof = True
+                        break
+                    pos += n
     except Exception as e:
         print(f"Error reading from PTY: {e}", file=sys.stderr)
         os.close(fd)
         return False, None
     
     os.close(fd)
-    return True, bytes(data)
+    with memoryview(buf) as view:
+        return True, bytes(view[:pos])
 
 
 def test_pty_write(pty_path, test_data):
@@ -102,6 +111,27 @@ def test_pty_write(pty_path, test_data):
         return False
 
 
+@contextlib.contextmanager
+def running_bridge(bridge):
+    """Run a bridge in a background thread for the duration of a block.
+    
+    The bridge is stopped and its thread joined on every exit path.
+    
+    Args:
+        bridge: RTTBridge to run
+        
+    Yields:
+        RTTBridge: The running bridge
+    """
+    thread = threading.Thread(target=bridge.start, daemon=True)
+    thread.start()
+    try:
+        yield bridge
+    finally:
+        bridge.stop()
+        thread.join(timeout=5)
+
+
 def run_integration_test(device, buffer_name='Terminal', bidir=False, 
                         rtt_address=None, timeout=10):
     """Run integration test.
@@ -120,153 +150,110 @@ def run_integration_test(device, buffer_name='Terminal', bidir=False,
     print("Integration Test for rtt2pty_pylink")
     print("=" * 60)
     
-    # Build command
-    script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                               'rtt2pty_pylink.py')
-    
-    if not os.path.exists(script_path):
-        print(f"Error: Script not found: {script_path}", file=sys.stderr)
-        return False
-    
-    cmd = [sys.executable, script_path, '-d', device, '-b', buffer_name]
-    
-    if bidir:
-        cmd.append('--bidir')
-    
-    if rtt_address:
-        cmd.extend(['-a', rtt_address])
-    
-    # Create temporary symlink path
-    with tempfile.NamedTemporaryFile(delete=False, prefix='rtt_test_') as tmp:
-        symlink_path = tmp.name
-    
-    cmd.extend(['-l', symlink_path])
-    
-    print(f"\nStarting rtt2pty_pylink...")
-    print(f"Command: {' '.join(cmd)}")
-    
-    # Start rtt2pty_pylink
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
-    except Exception as e:
-        print(f"Error starting rtt2pty_pylink: {e}", file=sys.stderr)
-        return False
-    
-    pty_path = None
-    output_lines = []
-    
-    # Wait for PTY to be created
-    print("Waiting for PTY creation...")
-    start_time = time.time()
-    
-    while (time.time() - start_time) < timeout:
-        if process.poll() is not None:
-            # Process exited
-            stdout, stderr = process.communicate()
-            print(f"Process exited with code {process.returncode}", file=sys.stderr)
-            print("STDOUT:", stdout, file=sys.stderr)
-            print("STDERR:", stderr, file=sys.stderr)
-            return False
+    with tempfile.TemporaryDirectory(prefix='rtt_test_') as link_dir:
+        link_path = os.path.join(link_dir, 'pty')
         
-        # Read output
-        if process.stdout:
-            line = process.stdout.readline()
-            if line:
-                output_lines.append(line.strip())
-                print(f"Output: {line.strip()}")
-                
-                # Check for PTY name
-                if 'PTY name is' in line:
-                    pty_path = find_pty_from_output([line])
-                    if pty_path:
-                        print(f"Found PTY: {pty_path}")
-                        break
+        try:
+            bridge = rtt2pty_pylink.create_bridge(device, buffer_name, bidir=bidir,
+                                                  address=rtt_address,
+                                                  link=link_path)
+        except ValueError as e:
+            print(f"Error: Invalid bridge configuration: {e}", file=sys.stderr)
+            return False
         
-        # Check symlink
-        if os.path.exists(symlink_path) and os.path.islink(symlink_path):
-            pty_path = os.readlink(symlink_path)
-            print(f"Found PTY via symlink: {pty_path}")
-            break
+        print("\nStarting rtt2pty_pylink bridge...")
+        with running_bridge(bridge):
+            # Wait for PTY to be created
+            print("Waiting for PTY creation...")
+            bridge.pty_ready.wait(timeout)
+            
+            if bridge.exit_code is not None:
+                print(f"Bridge exited with code {bridge.exit_code}", file=sys.stderr)
+                return False
+            
+            pty_path = bridge.pty_path
+            if not pty_path:
+                print("Error: PTY not created within timeout", file=sys.stderr)
+                return False
+            
+            print(f"Found PTY: {pty_path}")
+            
+            # Verify PTY exists
+            if not os.path.exists(pty_path):
+                print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
+                return False
+            
+            print(f"\nPTY created successfully: {pty_path}")
+            
+            # Verify the symlink points at the PTY
+            try:
+                link_target = os.readlink(link_path)
+            except OSError as e:
+                print(f"Error: Symlink not created: {e}", file=sys.stderr)
+                return False
+            if link_target != pty_path:
+                print(f"Error: Symlink {link_path} points to {link_target}, "
+                      f"expected {pty_path}", file=sys.stderr)
+                return False
+            
+            print(f"Symlink OK: {link_path} -> {link_target}")
+            
+            # Test reading from PTY
+            print("\nTesting PTY read...")
+            
+            success, data = test_pty_read(pty_path, timeout=5)
+            if success:
+                print(f"Read test: PASSED ({len(data)} bytes read)")
+                if data:
+                    print(f"Sample data (first 100 bytes): {data[:100]}")
+            else:
+                print("Read test: FAILED")
+                return False
+            
+            # Test writing to PTY (if bidirectional)
+            if bidir:
+                print("\nTesting PTY write (bidirectional mode)...")
+                test_data = b"TEST_DATA_FROM_PTY\n"
+                success = test_pty_write(pty_path, test_data)
+                if success:
+                    print("Write test: PASSED")
+                else:
+                    print("Write test: FAILED")
+                    return False
+            
+            print("\nCleaning up...")
         
-        time.sleep(0.1)
-    
-    if not pty_path:
-        print("Error: PTY not created within timeout", file=sys.stderr)
-        process.terminate()
-        time.sleep(1)
-        if process.poll() is None:
-            process.kill()
-        return False
-    
-    # Verify PTY exists
-    if not os.path.exists(pty_path):
-        print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
-        process.terminate()
-        time.sleep(1)
-        if process.poll() is None:
-            process.kill()
-        return False
-    
-    print(f"\nPTY created successfully: {pty_path}")
-    
-    # Test reading from PTY
-    print("\nTesting PTY read...")
-    time.sleep(1)  # Give RTT time to initialize
-    
-    success, data = test_pty_read(pty_path, timeout=5)
-    if success:
-        print(f"Read test: PASSED ({len(data)} bytes read)")
-        if data:
-            print(f"Sample data (first 100 bytes): {data[:100]}")
-    else:
-        print("Read test: FAILED")
-        process.terminate()
-        time.sleep(1)
-        if process.poll() is None:
-            process.kill()
-        return False
-    
-    # Test writing to PTY (if bidirectional)
-    if bidir:
-        print("\nTesting PTY write (bidirectional mode)...")
-        test_data = b"TEST_DATA_FROM_PTY\n"
-        success = test_pty_write(pty_path, test_data)
-        if success:
-            print("Write test: PASSED")
-        else:
-            print("Write test: FAILED")
-            process.terminate()
-            time.sleep(1)
-            if process.poll() is None:
-                process.kill()
+        # The bridge removes its symlink on shutdown
+        if os.path.lexists(link_path):
+            print(f"Error: Symlink not removed on shutdown: {link_path}",
+                  file=sys.stderr)
             return False
     
-    # Cleanup
-    print("\nCleaning up...")
-    process.terminate()
-    time.sleep(1)
-    if process.poll() is None:
-        process.kill()
-    
-    # Remove symlink
-    if os.path.exists(symlink_path):
-        try:
-            os.remove(symlink_path)
-        except OSError:
-            pass
-    
     print("\n" + "=" * 60)
     print("Integration test: PASSED")
     print("=" * 60)
     return True
 
 
+def run(device='NRF54L15_M33', buffer_name='Terminal', bidir=False,
+        rtt_address=None, timeout=10):
+    """Run the integration test as a test-runner entry point.
+    
+    Args:
+        device: Target device name
+        buffer_name: RTT buffer name
+        bidir: Enable bidirectional mode
+        rtt_address: RTT address or search range
+        timeout: Test timeout in seconds
+        
+    Returns:
+        tuple: (passed, failed) test counts
+    """
+    success = run_integration_test(device, buffer_name, bidir,
+                                   rtt_address, timeout)
+    return (1, 0) if success else (0, 1)
+
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(
@@ -286,7 +273,7 @@ def main():
     
     args = parser.parse_args()
     
-    success = run_integration_test(
+    passed, failed = run(
         args.device,
         args.buffer,
         args.bidir,
@@ -294,7 +281,7 @@ def main():
         args.timeout
     )
     
-    return 0 if success else 1
+    return 0 if failed == 0 else 1
 
 
 if __name__ == '__main__':
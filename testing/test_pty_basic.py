@@ -13,13 +13,27 @@ import pty
 import time
 import select
 import errno
+import contextlib
+import termios
 
 
-def test_pty_creation():
+def _reset_pty(slave_fd, attrs):
+    """Return the shared PTY pair to a clean state between tests.
+    
+    Args:
+        slave_fd: Slave file descriptor
+        attrs: Terminal attributes to restore on the slave
+    """
+    termios.tcsetattr(slave_fd, termios.TCSANOW, attrs)
+    # Discard anything a previous test left queued in either direction
+    termios.tcflush(slave_fd, termios.TCIOFLUSH)
+    os.set_blocking(slave_fd, True)
+
+
+def test_pty_creation(master_fd, slave_fd):
     """Test PTY creation."""
     print("Testing PTY creation...")
     try:
-        master_fd, slave_fd = pty.openpty()
         if master_fd < 0 or slave_fd < 0:
             print("FAILED: Invalid file descriptors")
             return False
@@ -27,26 +41,19 @@ def test_pty_creation():
         pty_name = os.ttyname(slave_fd)
         if not pty_name:
             print("FAILED: Could not get PTY name")
-            os.close(master_fd)
-            os.close(slave_fd)
             return False
         
         print(f"PASSED: Created PTY {pty_name}")
-        os.close(master_fd)
-        os.close(slave_fd)
         return True
     except Exception as e:
         print(f"FAILED: {e}")
         return False
 
 
-def test_pty_read_write():
+def test_pty_read_write(master_fd, slave_fd):
     """Test PTY read/write."""
     print("\nTesting PTY read/write...")
     try:
-        master_fd, slave_fd = pty.openpty()
-        pty_name = os.ttyname(slave_fd)
-        
         # Test data
         test_data = b"Hello, PTY!\n"
         
@@ -54,8 +61,6 @@ def test_pty_read_write():
         written = os.write(master_fd, test_data)
         if written != len(test_data):
             print(f"FAILED: Partial write {written}/{len(test_data)}")
-            os.close(master_fd)
-            os.close(slave_fd)
             return False
         
         # Read from slave
@@ -63,8 +68,6 @@ def test_pty_read_write():
         ready, _, _ = select.select([slave_fd], [], [], 1.0)
         if not ready:
             print("FAILED: No data available for reading")
-            os.close(master_fd)
-            os.close(slave_fd)
             return False
         
         data = os.read(slave_fd, len(test_data) + 100)
@@ -72,13 +75,9 @@ def test_pty_read_write():
             print(f"FAILED: Data mismatch")
             print(f"  Expected: {test_data}")
             print(f"  Got: {data}")
-            os.close(master_fd)
-            os.close(slave_fd)
             return False
         
         print("PASSED: Read/write test successful")
-        os.close(master_fd)
-        os.close(slave_fd)
         return True
         
     except Exception as e:
@@ -88,34 +87,24 @@ def test_pty_read_write():
         return False
 
 
-def test_pty_nonblocking():
+def test_pty_nonblocking(master_fd, slave_fd):
     """Test non-blocking PTY operations."""
     print("\nTesting non-blocking PTY operations...")
     try:
-        master_fd, slave_fd = pty.openpty()
-        
         # Set non-blocking
-        import fcntl
-        flags = fcntl.fcntl(slave_fd, fcntl.F_GETFL)
-        fcntl.fcntl(slave_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        os.set_blocking(slave_fd, False)
         
         # Try to read (should return EAGAIN)
         try:
             data = os.read(slave_fd, 1024)
             print("FAILED: Non-blocking read should have raised EAGAIN")
-            os.close(master_fd)
-            os.close(slave_fd)
             return False
         except OSError as e:
             if e.errno != errno.EAGAIN and e.errno != errno.EWOULDBLOCK:
                 print(f"FAILED: Unexpected error: {e}")
-                os.close(master_fd)
-                os.close(slave_fd)
                 return False
         
         print("PASSED: Non-blocking operations work correctly")
-        os.close(master_fd)
-        os.close(slave_fd)
         return True
         
     except Exception as e:
@@ -125,8 +114,12 @@ def test_pty_nonblocking():
         return False
 
 
-def main():
-    """Run all basic PTY tests."""
+def run():
+    """Run all basic PTY tests.
+    
+    Returns:
+        tuple: (passed, failed) test counts
+    """
     print("=" * 60)
     print("Basic PTY Functionality Tests")
     print("=" * 60)
@@ -140,20 +133,38 @@ def main():
     passed = 0
     failed = 0
     
-    for test in tests:
+    # All tests share one PTY pair, reset in between
+    with contextlib.ExitStack() as stack:
         try:
-            if test():
-                passed += 1
-            else:
+            master_fd, slave_fd = pty.openpty()
+            stack.callback(os.close, master_fd)
+            stack.callback(os.close, slave_fd)
+            attrs = termios.tcgetattr(slave_fd)
+        except (OSError, termios.error) as e:
+            print(f"FAILED: Could not create PTY pair: {e}")
+            return 0, len(tests)
+        
+        for test in tests:
+            try:
+                _reset_pty(slave_fd, attrs)
+                if test(master_fd, slave_fd):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"Test raised exception: {e}")
                 failed += 1
-        except Exception as e:
-            print(f"Test raised exception: {e}")
-            failed += 1
     
     print("\n" + "=" * 60)
     print(f"Results: {passed} passed, {failed} failed")
     print("=" * 60)
     
+    return passed, failed
+
+
+def main():
+    """Main function."""
+    passed, failed = run()
     return 0 if failed == 0 else 1
 
 
@@ -9,11 +9,18 @@ that the rtt2pty_pylink bridge works correctly.
 
 import os
 import sys
-import select
+import selectors
+import stat
 import time
 import argparse
 import errno
 
+# Initial capture buffer size when no byte limit is given; grown on demand
+CAPTURE_INITIAL_SIZE = 1 << 20
+
+# Maximum bytes requested per read while draining the PTY
+READ_SIZE = 1 << 16
+
 
 def read_from_pty(pty_path, timeout=30, max_bytes=None):
     """Read data from PTY.
@@ -26,69 +33,90 @@ def read_from_pty(pty_path, timeout=30, max_bytes=None):
     Returns:
         bytes: Data read from PTY
     """
-    if not os.path.exists(pty_path):
-        print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
-        return None
-    
-    if not os.path.ischar(pty_path) and not os.path.exists(pty_path):
-        print(f"Error: Path is not a character device: {pty_path}", file=sys.stderr)
-        return None
-    
     try:
         fd = os.open(pty_path, os.O_RDONLY | os.O_NONBLOCK)
+    except FileNotFoundError:
+        print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
+        return None
     except OSError as e:
         print(f"Error: Failed to open PTY '{pty_path}': {e}", file=sys.stderr)
         return None
     
-    data = bytearray()
-    start_time = time.time()
+    if not stat.S_ISCHR(os.fstat(fd).st_mode):
+        print(f"Error: Path is not a character device: {pty_path}", file=sys.stderr)
+        os.close(fd)
+        return None
+    
+    buf = bytearray(max_bytes or CAPTURE_INITIAL_SIZE)
+    pos = 0
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
     
     try:
         print(f"Reading from PTY: {pty_path}")
         print("Press Ctrl+C to stop...")
         
-        while True:
-            if timeout > 0 and (time.time() - start_time) > timeout:
-                print(f"\nTimeout after {timeout} seconds", file=sys.stderr)
+        done = False
+        while not done:
+            if max_bytes and pos >= max_bytes:
+                print(f"\nRead {pos} bytes (limit reached)", file=sys.stderr)
                 break
             
-            if max_bytes and len(data) >= max_bytes:
-                print(f"\nRead {len(data)} bytes (limit reached)", file=sys.stderr)
-                break
+            if deadline is None:
+                remaining = None
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"\nTimeout after {timeout} seconds", file=sys.stderr)
+                    break
+            
+            if not sel.select(timeout=remaining):
+                continue
             
-            try:
-                ready, _, _ = select.select([fd], [], [], 1.0)
-                if ready:
-                    chunk = os.read(fd, 4096)
-                    if chunk:
-                        data.extend(chunk)
-                        # Write to stdout immediately
-                        sys.stdout.buffer.write(chunk)
-                        sys.stdout.buffer.flush()
-                    else:
-                        # EOF
-                        print("\nEOF reached", file=sys.stderr)
+            # Drain everything available before waiting again
+            drained_from = pos
+            while True:
+                if pos == len(buf):
+                    if max_bytes:
                         break
-            except select.error as e:
-                if e.args[0] == errno.EBADF:
-                    print("\nError: File descriptor invalid", file=sys.stderr)
+                    buf.extend(bytes(len(buf)))
+                
+                # Read straight into the capture buffer
+                try:
+                    with memoryview(buf) as view:
+                        n = os.readv(fd, [view[pos:pos + READ_SIZE]])
+                except BlockingIOError:
                     break
-                raise
-            except OSError as e:
-                if e.errno == errno.EAGAIN or e.errno == errno.EWOULDBLOCK:
-                    # No data available, continue
-                    continue
-                elif e.errno == errno.EIO:
-                    print("\nI/O error on PTY", file=sys.stderr)
+                except OSError as e:
+                    if e.errno == errno.EIO:
+                        print("\nI/O error on PTY", file=sys.stderr)
+                        done = True
+                        break
+                    raise
+                
+                if not n:
+                    # EOF
+                    print("\nEOF reached", file=sys.stderr)
+                    done = True
                     break
-                raise
+                
+                pos += n
+            
+            # Echo the whole drained batch with a single write and flush
+            if pos > drained_from:
+                with memoryview(buf) as view:
+                    sys.stdout.buffer.write(view[drained_from:pos])
+                sys.stdout.buffer.flush()
     
     except KeyboardInterrupt:
         print("\nInterrupted by user", file=sys.stderr)
     finally:
+        sel.close()
         os.close(fd)
     
-    return bytes(data)
+    with memoryview(buf) as view:
+        return bytes(view[:pos])
 
 
 def main():
@@ -25,10 +25,6 @@ def write_to_pty(pty_path, data, delay=0.1):
     Returns:
         bool: True if successful, False otherwise
     """
-    if not os.path.exists(pty_path):
-        print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
-        return False
-    
     if isinstance(data, str):
         data = data.encode('utf-8')
     
@@ -38,6 +34,9 @@ def write_to_pty(pty_path, data, delay=0.1):
     
     try:
         fd = os.open(pty_path, os.O_WRONLY)
+    except FileNotFoundError:
+        print(f"Error: PTY path does not exist: {pty_path}", file=sys.stderr)
+        return False
     except OSError as e:
         print(f"Error: Failed to open PTY '{pty_path}': {e}", file=sys.stderr)
         return False
@@ -45,14 +44,19 @@ def write_to_pty(pty_path, data, delay=0.1):
     try:
         print(f"Writing to PTY: {pty_path}")
         
+        # Chunking only matters when pacing writes; otherwise hand the
+        # whole payload to the kernel at once.
+        view = memoryview(data)
+        chunk_size = 1024 if delay > 0 else max(len(view), 1)
+        
         total_written = 0
-        for i in range(0, len(data), 1024):
-            chunk = data[i:i+1024]
+        for i in range(0, len(view), chunk_size):
+            chunk = view[i:i+chunk_size]
             try:
-                written = os.write(fd, chunk)
-                total_written += written
-                if written != len(chunk):
-                    print(f"Warning: Partial write: {written}/{len(chunk)} bytes", file=sys.stderr)
+                while chunk:
+                    written = os.write(fd, chunk)
+                    total_written += written
+                    chunk = chunk[written:]
                 if delay > 0:
                     time.sleep(delay)
             except OSError as e: